@@ -0,0 +1,391 @@
+"""
+Array versions of the solving techniques, compiled with numba when it is installed.
+
+The board is passed around as flat arrays indexed the same way as Sudoku.cells:
+    values - the value of each cell, 0 if the cell has no value
+    candidates - the candidates bitmask of each cell, where bit k is set if k is a candidate
+    peers - the indices of the related cells of each cell
+    groups - the indices of the cells in each row, then each column, then each box
+    cell_groups - the row, column and box group of each cell, as indices into groups
+
+None of these functions record solve steps, they only update the arrays in place.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    JIT_AVAILABLE = True
+except ImportError:
+    JIT_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """
+        Stand-in for numba.njit when numba isn't installed. The functions are left as plain python
+        """
+
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+@njit(cache=True)
+def popcount(mask):
+    count = 0
+    while mask:
+        mask &= mask - 1
+        count += 1
+    return count
+
+
+@njit(cache=True)
+def lowest_bit(mask):
+    position = 0
+    while mask and not mask & 1:
+        mask >>= 1
+        position += 1
+    return position
+
+
+@njit(cache=True)
+def is_related(cell_groups, a, b):
+    return (cell_groups[a, 0] == cell_groups[b, 0]
+            or cell_groups[a, 1] == cell_groups[b, 1]
+            or cell_groups[a, 2] == cell_groups[b, 2])
+
+
+@njit(cache=True)
+def next_subset(masks, n, max_size, stack, unions, size):
+    """
+    Advances to the next subset of at least 2 of the first n masks whose union has exactly as many bits as the subset
+    has masks, the same search as find_subsets. The subsets are grown one mask at a time and a branch is dropped as soon
+    as its union has more than max_size bits. stack holds the positions of the members and unions[k] the union of the
+    first k of them. Start with stack[0] at -1, unions[0] at 0 and a size of 1, then pass back the size last returned
+
+    :return: The size of the subset, or 0 when there are no more subsets
+    """
+
+    depth = size - 1
+    while depth >= 0:
+        stack[depth] += 1
+        if stack[depth] >= n:
+            depth -= 1
+            continue
+        union = unions[depth] | masks[stack[depth]]
+        count = popcount(union)
+        if count > max_size:
+            continue
+        unions[depth + 1] = union
+        if count == depth + 1 and depth:
+            return depth + 1
+        if depth + 1 < max_size:
+            depth += 1
+            stack[depth] = stack[depth - 1]
+    return 0
+
+
+@njit(cache=True)
+def place_value(values, candidates, peers, index, value):
+    values[index] = value
+    candidates[index] = 1 << value
+    mask = ~(1 << value)
+    for peer in peers[index]:
+        if values[peer] == 0:
+            candidates[peer] &= mask
+
+
+@njit(cache=True)
+def remove_candidates(values, candidates, index, mask):
+    if values[index] == 0 and candidates[index] & mask:
+        candidates[index] &= ~mask
+        return True
+    return False
+
+
+@njit(cache=True)
+def solve_singles(values, candidates, peers, groups):
+    """
+    Naked and hidden singles
+    """
+
+    changed = False
+    for i in range(values.size):
+        mask = candidates[i]
+        if values[i] == 0 and mask and not mask & (mask - 1):
+            place_value(values, candidates, peers, i, lowest_bit(mask))
+            changed = True
+
+    for g in range(groups.shape[0]):
+        # candidates seen in exactly one cell of the group
+        once = 0
+        more = 0
+        for i in groups[g]:
+            if values[i] == 0:
+                more |= once & candidates[i]
+                once |= candidates[i]
+        hidden = once & ~more
+        while hidden:
+            bit = hidden & -hidden
+            for i in groups[g]:
+                if values[i] == 0 and candidates[i] & bit:
+                    place_value(values, candidates, peers, i, lowest_bit(bit))
+                    changed = True
+                    break
+            hidden ^= bit
+
+    return changed
+
+
+@njit(cache=True)
+def solve_subsets(values, candidates, groups, cell_groups):
+    """
+    Naked, hidden and locked subsets. A naked subset of size k has a hidden subset of the remaining cells as its
+    complement, so both are only searched up to half the empty cells of the group
+    """
+
+    changed = False
+    length = groups.shape[1]
+    cells = np.empty(length, dtype=np.int64)
+    positions = np.zeros(length + 1, dtype=np.int64)
+    digits = np.empty(length, dtype=np.int64)
+    # the masks searched for subsets, the cell each one belongs to, and the state of the search. See next_subset
+    masks = np.empty(length, dtype=np.int64)
+    pool = np.empty(length, dtype=np.int64)
+    stack = np.empty(length, dtype=np.int64)
+    unions = np.zeros(length + 1, dtype=np.int64)
+    for g in range(groups.shape[0]):
+        n = 0
+        for i in groups[g]:
+            if values[i] == 0:
+                cells[n] = i
+                n += 1
+
+        # naked subsets, the candidates of k cells are limited to k values. Only cells with at most as many
+        # candidates as the largest subset searched can be part of one
+        bound = n // 2
+        p = 0
+        for j in range(n):
+            if popcount(candidates[cells[j]]) <= bound:
+                masks[p] = candidates[cells[j]]
+                pool[p] = j
+                p += 1
+        stack[0] = -1
+        size = 1
+        while p >= 2:
+            size = next_subset(masks, p, bound, stack, unions, size)
+            if not size:
+                break
+            members = 0
+            for j in stack[:size]:
+                members |= 1 << pool[j]
+            for j in range(n):
+                if not members >> j & 1:
+                    changed = remove_candidates(values, candidates, cells[j], unions[size]) or changed
+
+        # hidden subsets, k values are limited to k cells
+        positions[:] = 0
+        for j in range(n):
+            mask = candidates[cells[j]]
+            while mask:
+                bit = mask & -mask
+                positions[lowest_bit(bit)] |= 1 << j
+                mask ^= bit
+        # likewise only values with at most as many positions as the largest subset searched
+        m = 0
+        for value in range(1, length + 1):
+            if positions[value] and popcount(positions[value]) <= bound:
+                digits[m] = value
+                masks[m] = positions[value]
+                m += 1
+        stack[0] = -1
+        size = 1
+        while m >= 2:
+            size = next_subset(masks, m, bound, stack, unions, size)
+            if not size:
+                break
+            kept = 0
+            for j in stack[:size]:
+                kept |= 1 << digits[j]
+            for j in range(n):
+                if unions[size] >> j & 1:
+                    changed = remove_candidates(values, candidates, cells[j], ~kept) or changed
+
+        # locked candidates, when a value within the group only lies in one other group, the value is removed from
+        # the rest of that group
+        for value in range(1, length + 1):
+            bit = 1 << value
+            first = -1
+            for j in range(n):
+                if candidates[cells[j]] & bit:
+                    first = cells[j]
+                    break
+            if first < 0:
+                continue
+            for relation in range(3):
+                target = cell_groups[first, relation]
+                if target == g:
+                    continue
+                shared = True
+                for j in range(n):
+                    if candidates[cells[j]] & bit and cell_groups[cells[j], relation] != target:
+                        shared = False
+                        break
+                if shared:
+                    for i in groups[target]:
+                        if cell_groups[i, 0] != g and cell_groups[i, 1] != g and cell_groups[i, 2] != g:
+                            changed = remove_candidates(values, candidates, i, bit) or changed
+
+    return changed
+
+
+@njit(cache=True)
+def solve_fish(values, candidates, groups, max_size):
+    """
+    Basic fish up to max_size, using rows then columns as the base lines. A fish of size k has a fish in the other
+    direction as its complement, so they are only searched up to half the lines containing the value
+    """
+
+    changed = False
+    length = groups.shape[1]
+    # the positions of the value in each line that has it, and the state of the search. See next_subset
+    masks = np.empty(length, dtype=np.int64)
+    lines = np.empty(length, dtype=np.int64)
+    stack = np.empty(length, dtype=np.int64)
+    unions = np.zeros(length + 1, dtype=np.int64)
+    for offset in (0, length):
+        for value in range(1, length + 1):
+            bit = 1 << value
+            n = 0
+            for line in range(length):
+                mask = 0
+                for position in range(length):
+                    i = groups[offset + line, position]
+                    if values[i] == 0 and candidates[i] & bit:
+                        mask |= 1 << position
+                if mask:
+                    masks[n] = mask
+                    lines[n] = line
+                    n += 1
+            stack[0] = -1
+            size = 1
+            while True:
+                size = next_subset(masks, n, min(n // 2, max_size), stack, unions, size)
+                if not size:
+                    break
+                members = 0
+                for j in stack[:size]:
+                    members |= 1 << lines[j]
+                for line in range(length):
+                    if not members >> line & 1:
+                        for position in range(length):
+                            if unions[size] >> position & 1:
+                                i = groups[offset + line, position]
+                                changed = remove_candidates(values, candidates, i, bit) or changed
+
+    return changed
+
+
+@njit(cache=True)
+def solve_wings(values, candidates, peers, cell_groups):
+    """
+    XY-Wings, a pivot cell with candidates xy sees two wing cells with candidates xz and yz. z is removed from every
+    cell seeing both wings
+    """
+
+    changed = False
+    for pivot in range(values.size):
+        if values[pivot] != 0 or popcount(candidates[pivot]) != 2:
+            continue
+        for a in range(peers.shape[1]):
+            wing_x = peers[pivot, a]
+            if values[wing_x] != 0 or popcount(candidates[wing_x]) != 2 or candidates[wing_x] == candidates[pivot]:
+                continue
+            for b in range(a + 1, peers.shape[1]):
+                wing_y = peers[pivot, b]
+                if values[wing_y] != 0 or popcount(candidates[wing_y]) != 2:
+                    continue
+                if candidates[wing_y] == candidates[pivot] or candidates[wing_y] == candidates[wing_x]:
+                    continue
+                if popcount(candidates[pivot] | candidates[wing_x] | candidates[wing_y]) != 3:
+                    continue
+                z = candidates[wing_x] & candidates[wing_y]
+                for i in peers[wing_x]:
+                    if i != pivot and i != wing_y and is_related(cell_groups, i, wing_y):
+                        changed = remove_candidates(values, candidates, i, z) or changed
+
+    return changed
+
+
+@njit(cache=True)
+def search(values, candidates, peers, groups):
+    """
+    Depth first search for when the techniques stall. Each guess is made in the empty cell with the fewest candidates
+    and followed up with singles, backing up to the last guess when a cell is left with no candidates
+
+    :return: True if a solution was found, which is left in the arrays. Otherwise the arrays are left as they were
+    """
+
+    size = values.size
+    original_values = values.copy()
+    original_candidates = candidates.copy()
+    # the board before each guess, the cell guessed and the candidates not yet tried there, indexed by depth
+    saved_values = np.empty((size, size), dtype=values.dtype)
+    saved_candidates = np.empty((size, size), dtype=candidates.dtype)
+    pivots = np.empty(size, dtype=np.int64)
+    untried = np.empty(size, dtype=np.int64)
+    depth = 0
+    while True:
+        while solve_singles(values, candidates, peers, groups):
+            pass
+        pivot = -1
+        fewest = 0
+        for i in range(size):
+            if values[i] == 0:
+                count = popcount(candidates[i])
+                if pivot < 0 or count < fewest:
+                    pivot = i
+                    fewest = count
+        if pivot < 0:
+            return True
+        # a value that has no place left in a group is just as much a dead end as a cell with no candidates
+        if fewest:
+            full = (1 << (groups.shape[1] + 1)) - 2
+            for g in range(groups.shape[0]):
+                seen = 0
+                for i in groups[g]:
+                    seen |= candidates[i]
+                if seen != full:
+                    fewest = 0
+                    break
+        if fewest:
+            saved_values[depth] = values
+            saved_candidates[depth] = candidates
+            pivots[depth] = pivot
+            untried[depth] = candidates[pivot]
+            depth += 1
+
+        while depth and not untried[depth - 1]:
+            depth -= 1
+        if not depth:
+            values[:] = original_values
+            candidates[:] = original_candidates
+            return False
+        values[:] = saved_values[depth - 1]
+        candidates[:] = saved_candidates[depth - 1]
+        bit = untried[depth - 1] & -untried[depth - 1]
+        untried[depth - 1] ^= bit
+        place_value(values, candidates, peers, pivots[depth - 1], lowest_bit(bit))
+
+
+@njit(cache=True)
+def solve(values, candidates, peers, groups, cell_groups, max_fish_size):
+    """
+    Applies all the techniques until none of them change the board
+    """
+
+    while True:
+        changed = solve_singles(values, candidates, peers, groups)
+        changed = solve_subsets(values, candidates, groups, cell_groups) or changed
+        changed = solve_fish(values, candidates, groups, max_fish_size) or changed
+        changed = solve_wings(values, candidates, peers, cell_groups) or changed
+        if not changed:
+            break
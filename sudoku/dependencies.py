@@ -2,13 +2,15 @@ from __future__ import annotations
 from typing import *
 from enum import Enum
 from dataclasses import dataclass
+import numpy as np
 import sudoku.puzzle as sudoku
 
 
 class CellRelation(Enum):
-    BOX = 0,
-    ROW = 1,
-    COLUMN = 2
+    # the values are bit flags, so a combination of relations can be passed around as a single int
+    BOX = 1
+    ROW = 2
+    COLUMN = 4
 
 
 class TechniqueArchetype(Enum):
@@ -18,6 +20,7 @@ class TechniqueArchetype(Enum):
     LOCKED = 3
     FISH = 4
     WING = 5
+    SEARCH = 6
 
 
 class ActionOperation(Enum):
@@ -59,17 +62,47 @@ class Wing:
     cells: Iterable[sudoku.Cell]
 
 
+@dataclass(frozen=True)
+class BoardLayout:
+    # The index tables of a board, which only depend on the box dimension. Everything is indexed by Cell.index, and
+    # shared by every board of the same dimension, so the tables are tuples, read only mappings and read only arrays
+    groups: Tuple[Tuple[int, ...], ...]
+    box_positions: Tuple[int, ...]
+    relation_peers: Tuple[Tuple[Tuple[int, ...], ...], ...]
+    peer_masks: Tuple[int, ...]
+    shared_groups: Mapping[CellRelation, Tuple[Tuple[Tuple[int, CellRelation], ...], ...]]
+    peer_indices: np.ndarray
+    group_indices: np.ndarray
+    cell_groups: np.ndarray
+    board_template: bytes
+    cell_offsets: Tuple[int, ...]
+
+
 # the default dimension of a single box (not the board)
 DEFAULT_BOX_SIZE = Dimension(3, 3)
 # The max is 25 only because of column labeling (A-Z). If i didn't output to only console, this limit could be increased
 MAX_CELL_VALUE = 25
-# Dictionary from cell value to single character (after 9, alpha characters are used)
-CELL_VALUE_MAP = dict(list(zip(
-    range(0, MAX_CELL_VALUE + 1),
+# Single character of each cell value, indexed by the value (after 9, alpha characters are used)
+CELL_VALUE_STR = tuple(
     [" "] + [str(i) for i in range(1, 10)] + [chr(code) for code in range(ord("A"), ord("A") + MAX_CELL_VALUE - 9)]
-)))
-NO_CANDIDATES = frozenset([])
+)
+# The same characters as a bytes.translate table, for rendering the board's value bytearray directly
+CELL_VALUE_BYTES = "".join(CELL_VALUE_STR).encode("ascii").ljust(256, b" ")
+# Dictionary from cell value to single character
+CELL_VALUE_MAP = dict(enumerate(CELL_VALUE_STR))
+# Dictionary from seed character to cell value, the reverse of CELL_VALUE_MAP. Empty cells map to None
+SEED_CHAR_TO_INT = dict(
+    [(c, v) for v, c in CELL_VALUE_MAP.items() if v] + [(c.lower(), v) for v, c in CELL_VALUE_MAP.items() if v > 9]
+)
+SEED_CHAR_TO_INT.update({".": None, "0": None, " ": None})
+# Line breaks and tabs only lay out a seed string, they aren't cells. Spaces are, as empty cells. Letters are made
+# uppercase in the same pass, so the seed reads the same as calculate_seed
+SEED_CLEAN_TABLE = str.maketrans(
+    "".join(c.lower() for c in CELL_VALUE_STR[10:]), "".join(CELL_VALUE_STR[10:]), "\n\r\t")
+# Candidates are stored as a bitmask, where bit k set means the value k is a possible candidate
+NO_CANDIDATES = 0
 ALL_RELATIONS = {r for r in CellRelation}
+ALL_RELATION_FLAGS = CellRelation.BOX.value | CellRelation.ROW.value | CellRelation.COLUMN.value
 TUPLE_SIZE = {
     1: "Single",
     2: "Pair",
@@ -81,10 +114,73 @@ FISH_SIZE = {
     3: "Swordfish",
     4: "Jellyfish"
 }
+# The largest fish searched for
+MAX_FISH_SIZE = max(FISH_SIZE)
+# The number of bits set in every 16 bit mask. Each doubling of the table is the previous half with one more bit set
+POPCOUNT_TABLE = bytearray(1)
+for _ in range(16): POPCOUNT_TABLE += POPCOUNT_TABLE.translate(bytes(range(1, 256)) + b"\0")
+POPCOUNT_TABLE = bytes(POPCOUNT_TABLE)
 RELATION = {
     CellRelation.BOX: "Box",
     CellRelation.ROW: "Row",
     CellRelation.COLUMN: "Column"
 }
 
-ModifyOperation = Callable[[Set[int], Tuple[Iterable[int], ...]], Set[int]]
+ModifyOperation = Callable[[int, int], int]
+
+
+def popcount(mask: int) -> int:
+    """
+    The number of candidates in the bitmask. Looked up 16 bits at a time, so the mask can have at most 32 bits, which
+    covers every candidates and positions bitmask up to MAX_CELL_VALUE
+
+    :param mask: The candidates bitmask
+    :return: Number of bits set
+    """
+
+    return POPCOUNT_TABLE[mask & 0xFFFF] + POPCOUNT_TABLE[mask >> 16]
+
+
+def bit_positions(mask: int) -> List[int]:
+    """
+    Expands the bitmask into the positions of its set bits, ordered from lowest to highest. For a candidates bitmask
+    these are the candidate values
+
+    :param mask: The bitmask
+    :return: The positions of the set bits
+    """
+
+    values = []
+    while mask:
+        low_bit = mask & -mask
+        values.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return values
+
+
+def positions_mask(positions: Iterable[int]) -> int:
+    """
+    Collapses the positions into a bitmask, the reverse of bit_positions
+
+    :param positions: The positions of the bits to set
+    :return: The bitmask
+    """
+
+    mask = 0
+    for position in positions:
+        mask |= 1 << position
+    return mask
+
+
+def relation_flags(relations: Iterable[CellRelation]) -> int:
+    """
+    Combines the relations into their bit flags
+
+    :param relations: The relations
+    :return: The bit flags of the relations
+    """
+
+    flags = 0
+    for relation in relations:
+        flags |= relation.value
+    return flags
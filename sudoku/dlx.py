@@ -0,0 +1,195 @@
+"""
+Knuth's Algorithm X with dancing links, for finishing a board as an exact cover problem.
+
+Every empty cell needs exactly one value, and every group needs each value it doesn't have yet exactly once. Those are
+the columns of the matrix. Each candidate of an empty cell is a row covering four of them: the cell, and the value in
+the cell's row, column and box.
+
+The links are kept in flat lists indexed by node rather than as node objects, node 0 being the root and nodes 1 to n
+the column headers.
+"""
+from __future__ import annotations
+from typing import *
+
+
+class DancingLinks(object):
+    def __init__(self, columns: int) -> None:
+        """
+        Initializes an empty matrix
+
+        :param columns: The number of columns, each one a constraint that has to be covered exactly once
+        """
+
+        headers = columns + 1
+        self.left = [i - 1 for i in range(0, headers)]
+        self.left[0] = columns
+        self.right = [i + 1 for i in range(0, headers)]
+        self.right[columns] = 0
+        self.up = list(range(0, headers))
+        self.down = list(range(0, headers))
+        # The column header of each node, and the row each node belongs to. Headers belong to no row
+        self.column = list(range(0, headers))
+        self.row = [-1] * headers
+        # The number of nodes in each column, indexed by the column header
+        self.size = [0] * headers
+
+    def add_row(self, row: int, columns: Iterable[int]) -> None:
+        """
+        Adds a row to the matrix
+
+        :param row: The id the row is reported as in the solution
+        :param columns: The columns the row covers
+        :return:
+        """
+
+        left, right, up, down = self.left, self.right, self.up, self.down
+        first = None
+        for header in columns:
+            header += 1
+            node = len(self.column)
+            self.column.append(header)
+            self.row.append(row)
+            self.size[header] += 1
+            # append to the bottom of the column
+            up.append(up[header])
+            down.append(header)
+            down[up[header]] = node
+            up[header] = node
+            # append to the end of the row
+            if first is None:
+                first = node
+                left.append(node)
+                right.append(node)
+            else:
+                left.append(left[first])
+                right.append(first)
+                right[left[first]] = node
+                left[first] = node
+
+    def cover(self, header: int) -> None:
+        """
+        Removes the column from the header list, and every row that covers it from the other columns
+
+        :param header: The column header
+        :return:
+        """
+
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header: int) -> None:
+        """
+        Restores a covered column, undoing cover in the reverse order
+
+        :param header: The column header
+        :return:
+        """
+
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def search(self) -> Optional[List[int]]:
+        """
+        Finds a set of rows covering every column exactly once
+
+        :return: The ids of the rows, or None if there is no exact cover
+        """
+
+        solution = []
+        return solution if self._search(solution) else None
+
+    def _search(self, solution: List[int]) -> bool:
+        """
+        Algorithm X, always branching on the column with the fewest rows left
+
+        :param solution: The rows chosen so far. Rows are appended on the way down and removed when backtracking
+        :return: True if every column is covered
+        """
+
+        right, left, down, column, size = self.right, self.left, self.down, self.column, self.size
+        header = right[0]
+        if not header: return True
+        fewest = header
+        while header and size[fewest] > 1:
+            if size[header] < size[fewest]: fewest = header
+            header = right[header]
+        if not size[fewest]: return False
+
+        self.cover(fewest)
+        node = down[fewest]
+        while node != fewest:
+            solution.append(self.row[node])
+            j = right[node]
+            while j != node:
+                self.cover(column[j])
+                j = right[j]
+            if self._search(solution): return True
+            j = left[node]
+            while j != node:
+                self.uncover(column[j])
+                j = left[j]
+            solution.pop()
+            node = down[node]
+        self.uncover(fewest)
+        return False
+
+
+def solve(values: MutableSequence[int], candidates: Sequence[int], cell_groups: Sequence[Sequence[int]],
+          length: int) -> bool:
+    """
+    Solves the board as an exact cover problem. Only the candidates of the empty cells are tried, so the candidates have
+    to be consistent with the values
+
+    :param values: The value of each cell, 0 if the cell has no value. Filled in when a solution is found
+    :param candidates: The candidates bitmask of each cell
+    :param cell_groups: The row, column and box group of each cell, numbered 0 to 3 * length - 1
+    :param length: The number of values, which is also the number of cells in a group
+    :return: True if a solution was found
+    """
+
+    cell_groups = [tuple(int(g) for g in groups) for groups in cell_groups]
+    empty = [i for i, v in enumerate(values) if not v]
+    # the constraints left to satisfy, numbered as columns: the empty cells, then the missing values of each group
+    constraints = {("cell", i): n for n, i in enumerate(empty)}
+    placed = {(g, v) for i, v in enumerate(values) if v for g in cell_groups[i]}
+    for g in range(0, 3 * length):
+        for v in range(1, length + 1):
+            if (g, v) not in placed: constraints[g, v] = len(constraints)
+
+    matrix = DancingLinks(len(constraints))
+    for i in empty:
+        mask = int(candidates[i])
+        while mask:
+            bit = mask & -mask
+            v = bit.bit_length() - 1
+            columns = [constraints["cell", i]] + [constraints.get((g, v)) for g in cell_groups[i]]
+            # a candidate already placed in one of its groups can never be part of a solution
+            if None not in columns: matrix.add_row(i * (length + 1) + v, columns)
+            mask ^= bit
+
+    solution = matrix.search()
+    if solution is None: return False
+    for row in solution:
+        i, v = divmod(row, length + 1)
+        values[i] = v
+    return True
@@ -1,11 +1,16 @@
 from __future__ import annotations
 from sudoku.dependencies import *
 import sudoku.solution as solution
+import sudoku._kernels as kernels
+import sudoku.dlx as dlx
 import numpy as np
-import itertools as it
-import math
-from collections import Counter
-import re
+import heapq
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import and_
+from types import MappingProxyType
 
 
 class Sudoku(object):
@@ -17,34 +22,103 @@ class Sudoku(object):
         :param size: Dimension of the box, not the board. Defaults to 3x3
         """
 
-        self.seed = [str(v) for v in iter(seed)]
+        if isinstance(seed, str):
+            # a seed string is already characters, so it only needs its layout stripped and letters made uppercase
+            self.seed = list(seed.translate(SEED_CLEAN_TABLE))
+        else:
+            self.seed = [str(v) for v in iter(seed)]
         if size is None:
-            # Try to determine the size of box by taking the 4th root of the seed length
-            size = int(math.sqrt(math.sqrt(len(self.seed))))
+            # Try to determine the size of box by taking the 4th root of the seed length. It's rounded rather than
+            # truncated so float error can't land one short, a seed that isn't a 4th power fails the length check below
+            size = round(len(self.seed) ** 0.25)
             self.size = Dimension(size, size)
         else:
             self.size = size
         self.length = self.size.width * self.size.height
-        self.ALL_CANDIDATES = set(range(1, self.length + 1))
+        if len(self.seed) != self.length**2:
+            raise ValueError("Seed has {} values, expected {}".format(len(self.seed), self.length**2))
+        self.ALL_CANDIDATES = (1 << (self.length + 1)) - 2
+        # The cell values of the board, walked by the techniques for every group
+        self.cell_values = range(1, self.length + 1)
+        # The board state, indexed by Cell.index. Cells read and write through these, so the array versions of the
+        # techniques can work on them directly. A value of 0 means the cell has no value
+        self.values = bytearray(self.length**2)
+        self.candidates = array("i", [NO_CANDIDATES]) * self.length**2
+        # Bitmasks of where each value can be placed within a row, column, or box. They are indexed by [group][value]
+        # and are kept in sync through track_candidates whenever the candidates of a cell change
+        self.row_digit_columns = [[0] * (self.length + 1) for _ in range(0, self.length)]
+        self.column_digit_rows = [[0] * (self.length + 1) for _ in range(0, self.length)]
+        self.box_digit_cells = [[0] * (self.length + 1) for _ in range(0, self.length)]
+        self.tracked_candidates = [NO_CANDIDATES] * self.length**2
+        # Incremented whenever the candidates of any cell change, so techniques can tell if the board changed
+        self.revision = 0
+        # When set, cells keep their previous candidates and techniques record solve steps. See tracking
+        self.track_changes = False
+        # The index tables only depend on the box dimension, so they're built once and shared between boards
+        layout = board_layout(self.size)
+        # The position of each cell within its box, matching the bits of box_digit_cells
+        self.box_positions = layout.box_positions
+        # The cells with no value, and bitmasks of their positions within each row, column, and box. They are kept in
+        # sync through track_value whenever a cell gains or loses its value. Every cell starts out empty
+        self.row_empty_columns = [(1 << self.length) - 1] * self.length
+        self.column_empty_rows = [(1 << self.length) - 1] * self.length
+        self.box_empty_cells = [(1 << self.length) - 1] * self.length
+        self.empty_cells = {}
 
         # Create each cell based on the seed value
-        self.cells = [
-            Cell(self.cell_box(loc), loc, v)
-            for loc, v in (
-                (self.index_to_location(i), v)
-                for i, v in it.zip_longest(range(0, self.length**2), self.seed, fillvalue=None)
-            )
+        self.cells = []
+        # the seed is parsed once, so the cells and reset only ever deal with ints
+        self.seed_values = [SEED_CHAR_TO_INT.get(v) for v in self.seed]
+        width, height = self.size.width, self.size.height
+        for i, v in enumerate(self.seed_values):
+            # same as index_to_location and cell_box, without the method calls
+            y, x = divmod(i, self.length)
+            self.cells.append(Cell(self, i, Point(x // height, y // width), Point(x, y), v))
+        self.empty_cells = dict.fromkeys(c for c in self.cells if c.value is None)
+
+        groups = [tuple(self.cells[i] for i in group) for group in layout.groups]
+        self.rows = groups[:self.length]
+        self.columns = groups[self.length:2 * self.length]
+        self.boxes = groups[2 * self.length:]
+
+        # The related cells never change for a board, so they're looked up once. They're indexed by
+        # [relation flags][Cell.index], with all the relations also kept as peers
+        self.relation_peers = [
+            [tuple(self.cells[i] for i in peers) for peers in relation_peers]
+            for relation_peers in layout.relation_peers
         ]
-        self.board = np.array(self.cells).reshape(self.length, self.length)
-
-        self.rows = [self.row(y) for y in range(0, self.length)]
-        self.columns = [self.column(x) for x in range(0, self.length)]
-        self.boxes = [self.box(Point(x, y))
-                      for y in range(0, self.size.height)
-                      for x in range(0, self.size.width)]
+        self.peers = self.relation_peers[ALL_RELATION_FLAGS]
+        # The same peers as bitmasks over Cell.index, for membership tests and intersecting peers of several cells
+        self.peer_masks = layout.peer_masks
+        # For each position within a group, the positions bitmasks of the other groups sharing that position, along
+        # with their relation. A set of positions lies within one of them when it has no bits outside of the mask
+        self.shared_groups = layout.shared_groups
+        # Index tables of the same relations, used by the array versions of the techniques
+        self.peer_index_lists = layout.relation_peers[ALL_RELATION_FLAGS]
+        self.peer_indices = layout.peer_indices
+        self.group_indices = layout.group_indices
+        self.cell_groups = layout.cell_groups
+
+        self.board_template, self.cell_offsets = layout.board_template, layout.cell_offsets
 
         self.solve_steps = []
-        self.populate_candidates()
+        with self.tracking():
+            self.populate_candidates()
+
+    @contextmanager
+    def tracking(self) -> Iterator[None]:
+        """
+        Keeps track of the previous candidates of each cell while in the context, which the solve steps are
+        built from. Outside of it the cells skip that bookkeeping and techniques don't record any steps
+
+        :return:
+        """
+
+        previous, self.track_changes = self.track_changes, True
+        try:
+            yield
+        finally:
+            self.track_changes = previous
 
     def reset(self) -> None:
         """
@@ -53,8 +127,10 @@ class Sudoku(object):
         :return:
         """
 
-        for cell, value in zip(self.cells, self.seed):
+        for cell, value in zip(self.cells, self.seed_values):
             cell.value = value
+        # cells that were emptied again went to the end, so restore the board order
+        self.empty_cells = dict.fromkeys(c for c in self.cells if c.value is None)
 
     def index_to_location(self, index: int) -> Point:
         """
@@ -64,7 +140,7 @@ class Sudoku(object):
         :return: The x, y location of the cell within the board
         """
 
-        return Point(index % self.length, int(index / self.length))
+        return Point(index % self.length, index // self.length)
 
     def location_to_index(self, location: Point) -> int:
         """
@@ -84,7 +160,17 @@ class Sudoku(object):
         :return: The x,y location of the box containing the cell
         """
 
-        return Point(int(location.x / self.size.height), int(location.y / self.size.width))
+        return Point(location.x // self.size.height, location.y // self.size.width)
+
+    def box_index(self, box: Point) -> int:
+        """
+        Converts the location of a box to its index in all the boxes
+
+        :param box: The x,y location of the box
+        :return: Index within all boxes
+        """
+
+        return box.y * self.size.width + box.x
 
     def cell(self, location: Point) -> Cell:
         """
@@ -95,33 +181,31 @@ class Sudoku(object):
         """
 
         if isinstance(location, str):
-            location_match = re.match("([A-Z])(\d+)", location.upper())
-            if location_match:
-                return self.board[int(location_match.group(2)) - 1][ord(location_match.group(1)) - ord("A")]
-        return self.board[location.y][location.x]
+            location = location.upper()
+            if location[:1].isalpha() and location[1:].isdigit():
+                return self.rows[int(location[1:]) - 1][ord(location[0]) - ord("A")]
+        return self.cells[self.location_to_index(location)]
 
-    def column(self, x: int, flatten: bool = True) -> List[Cell]:
+    def column(self, x: int) -> Tuple[Cell, ...]:
         """
         The group of cells at column x
 
         :param x: The column index
-        :param flatten: Flattens the 1xN into a Nx1 array
         :return: Column cells
         """
 
-        cells = self.board[:, x]
-        return (cells.flatten() if flatten else cells).tolist()
+        return self.columns[x]
 
-    def row(self, y: int) -> List[Cell]:
+    def row(self, y: int) -> Tuple[Cell, ...]:
         """
         The group of cells at row y
         :param y: The row index
         :return: Row cells
         """
 
-        return self.board[y].tolist()
+        return self.rows[y]
 
-    def box(self, location: Point, flatten: bool = True) -> List[Cell]:
+    def box(self, location: Point, flatten: bool = True) -> Union[Tuple[Cell, ...], List[Tuple[Cell, ...]]]:
         """
         The group of cells at box location
 
@@ -130,33 +214,91 @@ class Sudoku(object):
         :return: box cells
         """
 
-        cells = self.board[
-                location.y * self.size.width:(location.y + 1) * self.size.width,
-                location.x * self.size.height:(location.x + 1) * self.size.height]
-        return (cells.flatten() if flatten else cells).tolist()
+        return self.boxes[self.box_index(location)] if flatten else self._box_rows(location)
+
+    def _box_rows(self, location: Point) -> List[Tuple[Cell, ...]]:
+        """
+        The rows of the box at box location, each sliced down to the columns of the box
+
+        :param location: The x,y location of the box
+        :return: The MxN box cells
+        """
+
+        return [row[location.x * self.size.height:(location.x + 1) * self.size.height]
+                for row in self.rows[location.y * self.size.width:(location.y + 1) * self.size.width]]
+
+    def relation_groups(self, relation: CellRelation) -> Tuple[List[Tuple[Cell, ...]], List[List[int]], List[int]]:
+        """
+        The groups of a relation along with the value positions and empty cell positions of each group
 
-    def related_cells(self, parent: Cell, relations: Optional[Set[CellRelation]] = None,
-                      cell_filter: Optional[Callable] = None) -> List[Cell]:
+        :param relation: The relation of the groups
+        :return: The boxes, rows or columns, their positions bitmasks indexed by [group][value], and the positions
+        bitmasks of their empty cells
+        """
+
+        if relation is CellRelation.BOX:
+            return self.boxes, self.box_digit_cells, self.box_empty_cells
+        elif relation is CellRelation.ROW:
+            return self.rows, self.row_digit_columns, self.row_empty_columns
+        return self.columns, self.column_digit_rows, self.column_empty_rows
+
+    def related_cells(self, parent: Cell, relations: Union[None, int, Set[CellRelation]] = None) -> Tuple[Cell, ...]:
         """
         The group of cells that share a relation to the parent cell
 
         :param parent: The cell to find its relatives
-        :param relations: The relationships to search for. If nothing is passed, it defaults to all
-        :param cell_filter: Function used to filter out unwanted cells
+        :param relations: The relationships to search for, either as CellRelations or their combined bit flags. If
+        nothing is passed, it defaults to all
         :return: Related cells
         """
 
-        if relations is None: relations = ALL_RELATIONS
+        if relations is None: return self.peers[parent.index]
+        if not isinstance(relations, int): relations = relation_flags(relations)
+        return self.relation_peers[relations][parent.index]
 
-        cells = set()
-        if CellRelation.BOX in relations:
-            cells |= set(self.box(parent.box))
-        if CellRelation.ROW in relations:
-            cells |= set(self.row(parent.location.y))
-        if CellRelation.COLUMN in relations:
-            cells |= set(self.column(parent.location.x))
-        cells -= {parent}
-        return list(cells) if cell_filter is None else [c for c in cells if cell_filter(c)]
+    def track_value(self, cell: Cell) -> None:
+        """
+        Updates the empty cells when a cell gains or loses its value
+
+        :param cell: The cell that changed
+        :return:
+        """
+
+        row_bit, column_bit, box_bit = 1 << cell.column_id, 1 << cell.row_id, 1 << self.box_positions[cell.index]
+        if cell.value is None:
+            self.empty_cells[cell] = None
+            self.row_empty_columns[cell.row_id] |= row_bit
+            self.column_empty_rows[cell.column_id] |= column_bit
+            self.box_empty_cells[cell.box_id] |= box_bit
+        else:
+            self.empty_cells.pop(cell, None)
+            self.row_empty_columns[cell.row_id] &= ~row_bit
+            self.column_empty_rows[cell.column_id] &= ~column_bit
+            self.box_empty_cells[cell.box_id] &= ~box_bit
+
+    def track_candidates(self, cell: Cell) -> None:
+        """
+        Updates the value positions of the row, column and box of the cell, when the cell's candidates change. Cells
+        with a value are treated as having no candidates
+
+        :param cell: The cell that changed
+        :return:
+        """
+
+        candidates = cell.candidates if cell.value is None else NO_CANDIDATES
+        changed = self.tracked_candidates[cell.index] ^ candidates
+        if not changed: return
+        self.tracked_candidates[cell.index] = candidates
+        self.revision += 1
+
+        row_digits = self.row_digit_columns[cell.row_id]
+        column_digits = self.column_digit_rows[cell.column_id]
+        box_digits = self.box_digit_cells[cell.box_id]
+        row_bit, column_bit, box_bit = 1 << cell.column_id, 1 << cell.row_id, 1 << self.box_positions[cell.index]
+        for value in bit_positions(changed):
+            row_digits[value] ^= row_bit
+            column_digits[value] ^= column_bit
+            box_digits[value] ^= box_bit
 
     def populate_candidates(self) -> None:
         """
@@ -165,87 +307,227 @@ class Sudoku(object):
         :return:
         """
 
-        cells = [c for c in self.cells if c.value is None]
+        cells = list(self.empty_cells)
 
         if cells:
+            # the values used by each row, column and box are reduced over the whole board at once. A box spans
+            # size.width rows and size.height columns
+            values, _ = self.to_arrays()
+            board = ((1 << values.astype(np.intc)) & ~1).reshape(self.length, self.length)
+            row_used = np.bitwise_or.reduce(board, axis=1)
+            column_used = np.bitwise_or.reduce(board, axis=0)
+            box_used = np.bitwise_or.reduce(
+                board.reshape(self.size.height, self.size.width, self.size.width, self.size.height), axis=(1, 3))
+            used = (row_used[:, None] | column_used[None, :]
+                    | box_used.repeat(self.size.width, axis=0).repeat(self.size.height, axis=1))
+            candidates = (self.ALL_CANDIDATES & ~used).ravel().tolist()
             for cell in cells:
-                cell.candidates = self.ALL_CANDIDATES.difference(
-                    (rc.value for rc in self.related_cells(cell, cell_filter=lambda c: c.value is not None)))
+                cell.candidates = candidates[cell.index]
             cells = [c for c in cells if c.candidates != c.old_candidates]
             if cells: self.solve_steps.append(solution.step_populate(cells, self.ALL_CANDIDATES))
 
-    def apply_technique(self, technique: Technique, source_cells: Iterable[Cell], values: Set[int]) -> bool:
+    def apply_technique(self, technique: Technique, source_cells: Iterable[Cell], values: int) -> bool:
         """
         Applies the technique given to the given cells
 
         :param technique: The technique to use
         :param source_cells: The cells
-        :param values: The values to use
+        :param values: The values to use, as a candidates bitmask
         :return: True if a cell's value changed or any cell candidates
         """
 
         if not source_cells or not values: return False
 
+        record = self.track_changes
+        changed = False
         actions = []
         cells = list(source_cells)
+        target_cells = None
         if technique.type in [TechniqueArchetype.NAKED, TechniqueArchetype.HIDDEN] and technique.size == 1:
-            cells[0].value = next(iter(values))
-            if cells[0].value_changed():
+            value = values.bit_length() - 1
+            solved = cells[0].value != value
+            modified = self.set_value(cells[0].index, value)
+            changed = solved or bool(modified)
+            if record and solved:
                 actions.append(solution.action_solve(cells[0]))
-        elif technique.type is TechniqueArchetype.HIDDEN:
-            modified = modify_cell_candidates(cells, frozenset.intersection, values)
-            if modified:
-                actions.append(solution.action_intersection(modified, values))
-
-        target_cells = None
-        if technique.type is TechniqueArchetype.WING:
+            if record and modified:
+                actions.append(solution.action_difference(modified, values))
+        elif technique.type is TechniqueArchetype.WING:
             # right now only handle xy-wing
             pivot_cell = cells[0]
             wing_x = cells[1]
             wing_y = cells[2]
-            target_cells = set(iter(self.related_cells(wing_x)))
-            target_cells &= (set(iter(self.related_cells(wing_y))))
-            target_cells -= {pivot_cell}
+            target_cells = [
+                self.cells[i]
+                for i in bit_positions(self.peer_masks[wing_x.index] & self.peer_masks[wing_y.index]
+                                       & ~(1 << pivot_cell.index))
+            ]
         else:
-            target_cells = set().union(*[self.related_cells(
-                c, technique.target_relation,
-                cell_filter=lambda c: c.value is None and c not in source_cells)
-                for c in source_cells
-            ])
+            if technique.type is TechniqueArchetype.HIDDEN:
+                modified = modify_cell_candidates(cells, and_, values)
+                changed = changed or bool(modified)
+                if record and modified:
+                    actions.append(solution.action_intersection(modified, values))
+            # bit i is set when the cell with index i is part of the source cells
+            source_mask = positions_mask(c.index for c in cells)
+            target_flags = ALL_RELATION_FLAGS if technique.target_relation is None else relation_flags(
+                technique.target_relation)
+            target_cells = [
+                rc
+                for rc in dict.fromkeys(rc for c in cells for rc in self.related_cells(c, target_flags))
+                if not source_mask >> rc.index & 1
+            ]
         if target_cells:
-            modified = modify_cell_candidates(target_cells, frozenset.difference, values)
-            if modified:
+            modified = self.remove_candidates([c.index for c in target_cells], values)
+            changed = changed or bool(modified)
+            if record and modified:
                 actions.append(solution.action_difference(modified, values))
 
         if actions:
             self.solve_steps.append(solution.Step(technique, source_cells, values, actions))
-            return True
 
-        return False
+        return changed
+
+    def set_value(self, index: int, value: int) -> List[Cell]:
+        """
+        Sets the value of a cell and removes it from the candidates of every related cell
+
+        :param index: The index of the cell
+        :param value: The value to set
+        :return: The related cells whose candidates changed
+        """
+
+        self.cells[index].value = value
+        return self.remove_candidates(self.peer_index_lists[index], 1 << value)
 
-    def solve(self) -> None:
+    def remove_candidates(self, indices: Iterable[int], candidates: int) -> List[Cell]:
+        """
+        Removes the candidates from each cell with no value. Works on the board arrays directly, only the cells that
+        lose a candidate go through the cell for tracking
+
+        :param indices: The indices of the cells to modify
+        :param candidates: The candidates bitmask to remove
+        :return: The cells that were modified
+        """
+
+        values, board_candidates, cells, track_changes = self.values, self.candidates, self.cells, self.track_changes
+        modified = []
+        for i in indices:
+            old = board_candidates[i]
+            if not values[i] and old & candidates:
+                cell = cells[i]
+                if track_changes: cell.old_candidates = old
+                board_candidates[i] = old & ~candidates
+                self.track_candidates(cell)
+                modified.append(cell)
+        return modified
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Numpy views over the board state, indexed by Cell.index. Changes made through them are not tracked, so
+        sync_tracking has to be called afterwards
+
+        :return: The values (0 for no value) and the candidates bitmasks
+        """
+
+        return np.frombuffer(self.values, dtype=np.uint8), np.frombuffer(self.candidates, dtype=np.intc)
+
+    def sync_tracking(self) -> None:
+        """
+        Brings the value positions and revision up to date after the board state was changed through to_arrays
+
+        :return:
+        """
+
+        for cell in self.cells:
+            self.track_value(cell)
+            self.track_candidates(cell)
+
+    def solve(self, record_steps: bool = True) -> None:
         """
         Attempts to solve the puzzle using common techniques
 
+        :param record_steps: When False no solve steps are recorded, and if numba is installed the techniques run
+        compiled over flat arrays
         :return:
         """
         before = str(self)
+        if record_steps:
+            with self.tracking():
+                self.run_techniques()
+                self.search()
+        else:
+            if kernels.JIT_AVAILABLE:
+                values, candidates = self.to_arrays()
+                kernels.solve(values, candidates, self.peer_indices, self.group_indices, self.cell_groups,
+                              MAX_FISH_SIZE)
+                self.sync_tracking()
+            else:
+                self.run_techniques()
+            self.search()
+
+        after = str(self)
+        # prints a side by side of before and after board
+        for before_line, after_line in zip(before.split("\n"), after.split("\n")):
+            print("%s   %s" % (before_line, after_line))
+
+    def run_techniques(self) -> None:
+        """
+        Applies the techniques until none of them change the board
+
+        :return:
+        """
+
         techniques = [
             self.solve_singles,
             self.solve_subsets,
             self.solve_fish,
             self.solve_wings,
         ]
+        # the board revision when each technique last ran without changing anything. running it again before the
+        # board changes would find nothing new
+        clean_revisions = {}
         while True:
             changed = False
             for technique in techniques:
-                changed = changed or technique()
+                if clean_revisions.get(technique) == self.revision: continue
+                revision = self.revision
+                if technique():
+                    # start over from the cheapest technique, which usually finishes off what this one opened
+                    # up. measured against running every technique each round, this does less work overall
+                    changed = True
+                    break
+                if revision == self.revision: clean_revisions[technique] = revision
             if not changed: break
 
-        after = str(self)
-        # prints a side by side of before and after board
-        for before_line, after_line in zip(before.split("\n"), after.split("\n")):
-            print("%s   %s" % (before_line, after_line))
+    def search(self) -> bool:
+        """
+        Finishes the board by guessing once the techniques stall, always trying the cell with the fewest candidates
+        first. The search runs over copies of the board arrays, so the board only changes when a solution is found.
+        With numba the compiled search is used, otherwise the board is solved as an exact cover with dancing links,
+        which does far less work per guess in plain python
+
+        :return: True if the board was solved by the search
+        """
+
+        cells = list(self.empty_cells)
+        if not cells: return False
+        values, candidates = (a.copy() for a in self.to_arrays())
+        if kernels.JIT_AVAILABLE:
+            found = kernels.search(values, candidates, self.peer_indices, self.group_indices)
+        else:
+            found = dlx.solve(values, candidates, self.cell_groups, self.length)
+        if not found: return False
+
+        for cell in cells:
+            cell.value = int(values[cell.index])
+        if self.track_changes:
+            self.solve_steps.append(solution.Step(
+                Technique(TechniqueArchetype.SEARCH, len(cells)),
+                cells,
+                positions_mask(c.value for c in cells),
+                [solution.action_solve(c) for c in cells]))
+        return True
 
     def solve_singles(self) -> bool:
         """
@@ -260,25 +542,33 @@ class Sudoku(object):
         """
 
         changed = False
-        cells = [c for c in self.cells if c.value is None]
-        for cell in cells:
-            if len(cell.candidates) == 1:
-                changed = self.apply_technique(
-                    Technique(TechniqueArchetype.NAKED, 1, None, ALL_RELATIONS),
-                    [cell],
-                    cell.candidates) or changed
-            else:
-                for relation in ALL_RELATIONS:
-                    candidates = cell.candidates.difference(
-                        *[rc.candidates
-                          for rc in self.related_cells(cell, {relation}, cell_filter=lambda c: c.value is None)]
-                    )
-                    if len(candidates) == 1:
+        # the cells are visited fewest candidates first. placing a value pushes its peers again with their new count,
+        # so the naked singles it leaves behind are placed in the same pass. candidates only shrink here, so an entry
+        # whose count no longer matches the cell is stale and skipped
+        values, candidates, cells, peers = self.values, self.candidates, self.cells, self.peer_index_lists
+        queue = [(popcount(candidates[c.index]), c.index) for c in self.empty_cells]
+        heapq.heapify(queue)
+        while queue and queue[0][0] <= 1:
+            count, index = heapq.heappop(queue)
+            if not count or values[index] or popcount(candidates[index]) != count: continue
+            changed = self.apply_technique(
+                Technique(TechniqueArchetype.NAKED, 1, None, ALL_RELATIONS),
+                [cells[index]],
+                candidates[index]) or changed
+            for peer in peers[index]:
+                if not values[peer]: heapq.heappush(queue, (popcount(candidates[peer]), peer))
+
+        # a value with a single position left in a group is a hidden single
+        for relation in ALL_RELATIONS:
+            groups, group_positions, _ = self.relation_groups(relation)
+            for group, positions in zip(groups, group_positions):
+                for value in self.cell_values:
+                    position = positions[value]
+                    if position and not position & (position - 1):
                         changed = self.apply_technique(
                             Technique(TechniqueArchetype.HIDDEN, 1, {relation}, ALL_RELATIONS),
-                            [cell],
-                            candidates
-                        )
+                            [group[position.bit_length() - 1]],
+                            1 << value) or changed
 
         return changed
 
@@ -301,41 +591,42 @@ class Sudoku(object):
 
         changed = False
         for relation in ALL_RELATIONS:
-            # this is filtering the multi-dimensional array of rows, columns, or boxes so that each sub-array contains
-            # only cells with no value set
-            cell_groups = [grp for grp in [[c for c in grp if c.value is None] for grp in (
-                self.boxes if relation is CellRelation.BOX
-                else self.rows if relation is CellRelation.ROW
-                else self.columns
-            )] if grp]
-            for cells in cell_groups:
-                # we only check for subsets of at least size 2 and 1 less then the total number cells
-                for subset_length in range(2, len(cells) - 1):
-                    for subset in it.combinations(cells, subset_length):
-                        other_cells = [c for c in cells if c not in subset]
-                        source_candidates = set().union(*[c.candidates for c in subset])
-                        target_candidates = source_candidates - set().union(*[c.candidates for c in other_cells])
-                        if len(target_candidates) == subset_length:
-                            changed = self.apply_technique(
-                                Technique(TechniqueArchetype.NAKED
-                                          if source_candidates == target_candidates else
-                                          TechniqueArchetype.HIDDEN,
-                                          len(target_candidates), {relation}, {relation}),
-                                subset, target_candidates) or changed
-                        elif len(target_candidates) < subset_length:
-                            target_relation = None
-                            if relation is CellRelation.BOX:
-                                if is_same_column(subset):
-                                    target_relation = CellRelation.COLUMN
-                                elif is_same_row(subset):
-                                    target_relation = CellRelation.ROW
-                            elif is_same_box(subset):
-                                target_relation = CellRelation.BOX
-                            if target_relation is not None:
-                                changed = self.apply_technique(
-                                    Technique(TechniqueArchetype.LOCKED, subset_length, {relation}, {target_relation}),
-                                    subset, target_candidates) or changed
-                                
+            for group, positions, empty in zip(*self.relation_groups(relation)):
+                cells = [group[i] for i in bit_positions(empty)]
+                # a naked subset of k cells has a hidden subset of the remaining cells as its complement, so both are
+                # only searched up to half the cells
+                max_length = len(cells) // 2
+
+                # naked subsets, the candidates of k cells are limited to k values
+                for subset_indices, candidates in find_subsets([c.candidates for c in cells], max_length):
+                    changed = self.apply_technique(
+                        Technique(TechniqueArchetype.NAKED, len(subset_indices), {relation}, {relation}),
+                        [cells[i] for i in subset_indices], candidates) or changed
+
+                # hidden subsets, k values are limited to k cells. The positions are bits of the cell within the group
+                values = [v for v in self.cell_values if positions[v]]
+                for subset_indices, cell_positions in find_subsets([positions[v] for v in values], max_length):
+                    changed = self.apply_technique(
+                        Technique(TechniqueArchetype.HIDDEN, len(subset_indices), {relation}, {relation}),
+                        [group[i] for i in bit_positions(cell_positions)],
+                        positions_mask(values[i] for i in subset_indices)) or changed
+
+                # locked candidates, when the cells of a value are all within another group, the value is removed from
+                # the rest of that group
+                shared_groups = self.shared_groups[relation]
+                for value in self.cell_values:
+                    value_positions = positions[value]
+                    if popcount(value_positions) < 2: continue
+                    # any group holding all the positions also holds the lowest one
+                    for shared_positions, target_relation in shared_groups[
+                            (value_positions & -value_positions).bit_length() - 1]:
+                        if value_positions & ~shared_positions: continue
+                        subset = [group[i] for i in bit_positions(value_positions)]
+                        changed = self.apply_technique(
+                            Technique(TechniqueArchetype.LOCKED, len(subset), {relation}, {target_relation}),
+                            subset, 1 << value) or changed
+                        break
+
         return changed
 
     def solve_fish(self) -> bool:
@@ -353,60 +644,34 @@ class Sudoku(object):
 
         changed = False
 
-        for relation in {CellRelation.ROW, CellRelation.COLUMN}:
-            # filter out cells with values
-            cell_grouping = [
-                [c for c in grp if c.value is None]
-                for grp in (self.rows if relation is CellRelation.ROW else self.columns)
-            ]
-            # finds naked or hidden subsets
-            group_sets = [grp for grp in [
-                [
-                    subset
-                    for subset_length in range(2, len(grp) + 1)
-                    for subset in it.combinations(grp, subset_length)
-                    if len(self.ALL_CANDIDATES.intersection(*[c.candidates for c in subset]) -
-                           set().union(*[c.candidates for c in grp if c not in subset])) >= 1
+        for relation in (CellRelation.ROW, CellRelation.COLUMN):
+            if relation is CellRelation.ROW:
+                digit_lines, cover_relation, lines = self.row_digit_columns, CellRelation.COLUMN, self.rows
+            else:
+                digit_lines, cover_relation, lines = self.column_digit_rows, CellRelation.ROW, self.columns
+            for value in self.cell_values:
+                # the lines where the value is still a candidate. the positions of the value in a fish of size n are
+                # covered by just as many lines, which is what find_subsets searches for. a fish of size n in one
+                # direction leaves a fish of the remaining lines in the other direction, which removes the same
+                # candidates, so only fish up to half the lines need to be searched. past jellyfish the search is
+                # too costly for large boards, so the size is capped at the named fish
+                base_lines = [i for i, positions in enumerate(digit_lines) if positions[value]]
+                fishes = [
+                    [base_lines[i] for i in fish]
+                    for fish, _ in find_subsets([digit_lines[i][value] for i in base_lines],
+                                                min(len(base_lines) // 2, MAX_FISH_SIZE))
                 ]
-                for grp in cell_grouping
-            ] if grp]
-            if len(group_sets) < 2: return False
-            # this will find all combinations of subsets from each row/column
-            # then it only allows where they have at least one common candidate
-            # and also that there is at least 2 intersections of each cell
-            fishes = [
-                Fish(fish_size, [c for subset in fish for c in subset])
-                for fish_size in range(2, len(group_sets) + 1)
-                for fish_stock in it.combinations(group_sets, fish_size)
-                for fish in it.product(*fish_stock)
-                if len({c.location.x if relation is CellRelation.ROW else c.location.y for subset in fish for c in subset}) == fish_size
-                and len(self.ALL_CANDIDATES.intersection(*[c.candidates for subset in fish for c in subset])) >= 1
-                and len(
-                    [cnt for _, cnt in
-                     Counter([
-                         c.location.x if relation is CellRelation.ROW else c.location.y
-                         for subset in fish
-                         for c in subset]
-                     ).items() if cnt == 1]
-                ) == 0
-            ]
-            # lets do the magic
-            for fish in fishes:
-                candidates = self.ALL_CANDIDATES.intersection(*[c.candidates for c in fish.cells])
-                candidates -= set().union(*[
-                    rc.candidates
-                    for c in fish.cells
-                    for rc in self.related_cells(c, {relation})
-                    if rc.value is None and rc not in fish.cells
-                ])
-                changed = self.apply_technique(
-                    Technique(TechniqueArchetype.FISH, 
-                              fish.size, 
-                              {relation}, 
-                              {CellRelation.ROW if relation is CellRelation.COLUMN else CellRelation.COLUMN}),
-                    fish.cells,
-                    candidates
-                ) or changed
+                for fish in fishes:
+                    fish = Fish(len(fish), [
+                        lines[i][position]
+                        for i in fish
+                        for position in bit_positions(digit_lines[i][value])
+                    ])
+                    changed = self.apply_technique(
+                        Technique(TechniqueArchetype.FISH, fish.size, {relation}, {cover_relation}),
+                        fish.cells,
+                        1 << value
+                    ) or changed
 
         return changed
 
@@ -420,22 +685,29 @@ class Sudoku(object):
         """
 
         changed = False
-        for pivot_cell in [c for c in self.cells if c.value is None and len(c.candidates) == 2]:
-            related_cells = self.related_cells(
-                pivot_cell,
-                cell_filter=lambda c:
-                c.value is None and len(c.candidates) == 2 and c.candidates != pivot_cell.candidates
-            )
-            wings = [wc for wc in it.combinations(related_cells, 2)
-                     if wc[0].candidates != wc[1].candidates
-                     and not wc[0].is_related(wc[1])
-                     and len(pivot_cell.candidates | wc[0].candidates | wc[1].candidates) == 3]
-            for wing in wings:
-                changed = self.apply_technique(
-                    Technique(TechniqueArchetype.WING, 2, None, ALL_RELATIONS),
-                    [pivot_cell, *wing],
-                    wing[0].candidates.intersection(wing[1].candidates)
-                )
+        bivalue_cells = [c for c in self.empty_cells if popcount(c.candidates) == 2]
+        cells_by_candidates = defaultdict(list)
+        for cell in bivalue_cells: cells_by_candidates[cell.candidates].append(cell)
+
+        for pivot_cell in bivalue_cells:
+            pivot_candidates = pivot_cell.candidates
+            if pivot_cell.value is not None or popcount(pivot_candidates) != 2: continue
+            pivot_peers = self.peer_masks[pivot_cell.index]
+            # the pivot has candidates xy, so the wings must have xz and yz, where z is any other candidate
+            x = pivot_candidates & -pivot_candidates
+            y = pivot_candidates ^ x
+            for z in bit_positions(self.ALL_CANDIDATES & ~pivot_candidates):
+                wing_x_candidates, wing_y_candidates = x | 1 << z, y | 1 << z
+                for wing_x in cells_by_candidates.get(wing_x_candidates, ()):
+                    if not pivot_peers >> wing_x.index & 1 or wing_x.candidates != wing_x_candidates: continue
+                    for wing_y in cells_by_candidates.get(wing_y_candidates, ()):
+                        if not pivot_peers >> wing_y.index & 1 or wing_y.candidates != wing_y_candidates: continue
+                        if wing_x.is_related(wing_y): continue
+                        changed = self.apply_technique(
+                            Technique(TechniqueArchetype.WING, 2, None, ALL_RELATIONS),
+                            [pivot_cell, wing_x, wing_y],
+                            1 << z
+                        ) or changed
 
         return changed
 
@@ -446,33 +718,10 @@ class Sudoku(object):
         :return: Pretty board output
         """
 
-        # since strings are immutable, this is my attempt at emulating StringBuffer in Java
-        column_labels = list()
-        column_labels.append("   ")
-        for x in range(0, self.length):
-            if x % self.size.height == 0: column_labels.append("  ")
-            column_labels.append("{} ".format(chr(ord("A") + x)))
-        column_labels.append("    \n")
-
-        line = list()
-        line.append("   ")
-        line.extend(["+" if i % 2 == 0 else "-" * (self.size.height * 2 + 1)
-                    for i in range(0, self.size.width * 2)])
-        line.append("+   \n")
-
-        buffer = list()
-        buffer.extend(column_labels)
-        for y, row in enumerate(self.board):
-            if y % self.size.width == 0: buffer.extend(line)
-            buffer.append("{: >2} ".format(y + 1))
-            for x, cell in enumerate(row):
-                if x % self.size.height == 0: buffer.append("| ")
-                buffer.append("{} ".format(str(cell)))
-            buffer.append("| {: <2}\n".format(y + 1))
-        buffer.extend(line)
-        buffer.extend(column_labels)
-
-        return "".join(buffer)
+        buffer = bytearray(self.board_template)
+        for offset, character in zip(self.cell_offsets, self.values.translate(CELL_VALUE_BYTES)):
+            buffer[offset] = character
+        return buffer.decode("ascii")
 
     def print(self) -> None:
         """
@@ -499,19 +748,29 @@ class Sudoku(object):
 
 
 class Cell(object):
-    def __init__(self, box: Point, location: Point, value: Union[int, str] = None) -> None:
+    __slots__ = ("puzzle", "index", "box", "location", "row_id", "column_id", "box_id", "old_candidates")
+
+    def __init__(self, puzzle: Sudoku, index: int, box: Point, location: Point, value: Union[int, str] = None) -> None:
         """
-        Initializes the cell object
+        Initializes the cell object. The value and candidates are stored by the puzzle, the cell is a view of them
 
+        :param puzzle: The board the cell belongs to
+        :param index: The cells index within all the cells of the board
         :param box: The box the cell is located in
         :param location: The cells location in the board
         :param value: The initial value of the cell. If a string is passed it's converted to it's int value based
         on CELL_VALUE_MAP
         """
 
+        self.puzzle = puzzle
+        self.index = index
         self.box = box
         self.location = location
-        self.candidates = NO_CANDIDATES
+        # plain int ids of the groups the cell belongs to, for quick comparisons
+        self.row_id = location.y
+        self.column_id = location.x
+        self.box_id = puzzle.box_index(box)
+        self.old_candidates = NO_CANDIDATES
         self.value = value
 
     def __str__(self) -> str:
@@ -521,7 +780,7 @@ class Cell(object):
         :return: The cell's value
         """
 
-        return " " if self.value is None else CELL_VALUE_MAP[self.value]
+        return CELL_VALUE_STR[self.puzzle.values[self.index]]
 
     def __repr__(self) -> str:
         """
@@ -552,7 +811,7 @@ class Cell(object):
                 return "{}{}".format(chr(ord("A") + self.location.y), self.location.x + 1)
                 # return "{}{}".format(chr(ord("A") + self.location.x), self.location.y + 1)
         elif var == "candidates":
-            return "{{{}}}".format(", ".join(CELL_VALUE_MAP[v] for v in self.candidates))
+            return "{{{}}}".format(", ".join(CELL_VALUE_STR[v] for v in bit_positions(self.candidates)))
         elif var == "value":
             return str(var) if self.value is not None or options is None else options
 
@@ -563,8 +822,7 @@ class Cell(object):
         :return: True if related, false otherwise
         """
 
-        cells = [self, other_cell]
-        return is_same_box(cells) or is_same_column(cells) or is_same_row(cells)
+        return bool(self.puzzle.peer_masks[self.index] >> other_cell.index & 1)
 
     @property
     def value(self) -> int:
@@ -574,68 +832,178 @@ class Cell(object):
         :return: value
         """
 
-        return self._value
+        return self.puzzle.values[self.index] or None
 
     @value.setter
     def value(self, value: Union[int, str]) -> None:
         """
         Setter method for value. Allows for int, string input. Strings are converted to int based on the CELL_VALUE_MAP
-        Stores the previous value to track changes
 
         :param value: value to set
         :return:
         """
 
-        try:
-            self.old_value = NO_CANDIDATES if self._value is None else self._value
-        except AttributeError:
-            self.old_value = None
-        if isinstance(value, int):
-            self._value = value
-        elif isinstance(value, str) and len(value) == 1:
-            if ord("A") <= ord(value.upper()) <= ord("Z"):
-                self._value = ord(value.upper()) - ord("A") + 10
-            elif ord("1") <= ord(value) <= ord("9"):
-                self._value = int(value)
-            else:
-                self._value = None
-        else:
-            self._value = None
-        self.candidates = {self.value} if self.value else NO_CANDIDATES
+        puzzle, index = self.puzzle, self.index
+        old_value = puzzle.values[index]
+        # ints are passed straight through, only strings and None need the lookup
+        if type(value) is not int: value = SEED_CHAR_TO_INT.get(value)
+        puzzle.values[index] = value or 0
+        if bool(old_value) != bool(value): puzzle.track_value(self)
+        self.candidates = 1 << value if value else NO_CANDIDATES
 
     @property
-    def candidates(self) -> Set[int]:
+    def candidates(self) -> int:
         """
         Candidates variables wrapper
 
-        :return: set
+        :return: bitmask, where bit k is set if k is a candidate
         """
 
-        return self._candidates
+        return self.puzzle.candidates[self.index]
 
     @candidates.setter
-    def candidates(self, value: Set[int]) -> None:
+    def candidates(self, value: int) -> None:
         """
         Candidate setter wrapper
         Stores the previous value to track changes
 
-        :param value: The candidates
+        :param value: The candidates bitmask
         :return:
         """
 
-        try:
-            self.old_candidates = NO_CANDIDATES if self._candidates is None else self._candidates
-        except AttributeError:
-            self.old_candidates = frozenset(value)
-        self._candidates = frozenset(value) if value else NO_CANDIDATES
-
-    def value_changed(self) -> bool:
-        return self.old_value != self.value
+        puzzle = self.puzzle
+        if puzzle.track_changes: self.old_candidates = puzzle.candidates[self.index]
+        puzzle.candidates[self.index] = value if value else NO_CANDIDATES
+        puzzle.track_candidates(self)
 
     def candidates_changed(self) -> bool:
         return self.old_candidates != self.candidates
 
 
+def build_board_template(size: Dimension) -> Tuple[bytes, Tuple[int, ...]]:
+    """
+    Builds the board output with row and column labels and blank cells, for Sudoku.__str__ to fill in
+
+    :param size: Dimension of the box
+    :return: The board output, and the offset of each cell's character in it, indexed by Cell.index
+    """
+
+    length = size.width * size.height
+    # since strings are immutable, this is my attempt at emulating StringBuffer in Java
+    column_labels = list()
+    column_labels.append("   ")
+    for x in range(0, length):
+        if x % size.height == 0: column_labels.append("  ")
+        column_labels.append("{} ".format(chr(ord("A") + x)))
+    column_labels.append("    \n")
+
+    line = list()
+    line.append("   ")
+    line.extend(["+" if i % 2 == 0 else "-" * (size.height * 2 + 1)
+                for i in range(0, size.width * 2)])
+    line.append("+   \n")
+
+    buffer = list()
+    buffer.extend(column_labels)
+    offsets = list()
+    for y in range(0, length):
+        if y % size.width == 0: buffer.extend(line)
+        row = "{: >2} ".format(y + 1)
+        # the offset of the cell character counts everything before it, including this row so far
+        written = sum(len(s) for s in buffer)
+        for x in range(0, length):
+            if x % size.height == 0: row += "| "
+            offsets.append(written + len(row))
+            row += "  "
+        buffer.append(row)
+        buffer.append("| {: <2}\n".format(y + 1))
+    buffer.extend(line)
+    buffer.extend(column_labels)
+
+    return "".join(buffer).encode("ascii"), tuple(offsets)
+
+
+def read_only_array(table: Iterable[Iterable[int]]) -> np.ndarray:
+    """
+    Builds an index table that can't be written to, for the tables shared between boards
+
+    :param table: The rows of the table
+    :return: The table as an int32 array
+    """
+
+    table = np.array(table, dtype=np.int32)
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=None)
+def board_layout(size: Dimension) -> BoardLayout:
+    """
+    Builds the index tables of a board with the given box dimension. A box spans size.width rows and size.height
+    columns
+
+    :param size: Dimension of the box
+    :return: The board layout
+    """
+
+    width, height = size.width, size.height
+    length = width * height
+    rows = [tuple(range(y * length, (y + 1) * length)) for y in range(0, length)]
+    columns = [tuple(range(x, length**2, length)) for x in range(0, length)]
+    boxes = [
+        tuple((box_y * width + y) * length + box_x * height + x for y in range(0, width) for x in range(0, height))
+        for box_y in range(0, height)
+        for box_x in range(0, width)
+    ]
+    # the row, column and box of each cell
+    cell_ids = [(i // length, i % length, (i // length // width) * width + i % length // height)
+                for i in range(0, length**2)]
+
+    single_relation_peers = {
+        CellRelation.ROW: [tuple(j for j in rows[r] if j != i) for i, (r, _, _) in enumerate(cell_ids)],
+        CellRelation.COLUMN: [tuple(j for j in columns[c] if j != i) for i, (_, c, _) in enumerate(cell_ids)],
+        CellRelation.BOX: [tuple(j for j in boxes[b] if j != i) for i, (_, _, b) in enumerate(cell_ids)]
+    }
+    # indexed by relation flags, where no flags means no peers
+    relation_peers = [None] * (ALL_RELATION_FLAGS + 1)
+    relation_peers[0] = ((),) * length**2
+    for flags in range(1, ALL_RELATION_FLAGS + 1):
+        relations = [single_relation_peers[r] for r in CellRelation if flags & r.value]
+        relation_peers[flags] = tuple(relations[0]) if len(relations) == 1 else tuple(
+            tuple(dict.fromkeys(j for peers in relations for j in peers[i])) for i in range(0, length**2)
+        )
+    peers = relation_peers[ALL_RELATION_FLAGS]
+
+    shared_groups = MappingProxyType({
+        CellRelation.ROW: tuple(
+            ((((1 << height) - 1) << (x - x % height), CellRelation.BOX),) for x in range(0, length)
+        ),
+        CellRelation.COLUMN: tuple(
+            ((((1 << width) - 1) << (y - y % width), CellRelation.BOX),) for y in range(0, length)
+        ),
+        CellRelation.BOX: tuple(
+            ((positions_mask(range(p % height, length, height)), CellRelation.COLUMN),
+             (((1 << height) - 1) << (p - p % height), CellRelation.ROW))
+            for p in range(0, length)
+        )
+    })
+    board_template, cell_offsets = build_board_template(size)
+
+    # the layout is shared by every board of the dimension, so it's built out of tuples and read only arrays
+    return BoardLayout(
+        groups=tuple(rows + columns + boxes),
+        box_positions=tuple((y % width) * height + x % height for y in range(0, length) for x in range(0, length)),
+        relation_peers=tuple(relation_peers),
+        peer_masks=tuple(positions_mask(p) for p in peers),
+        shared_groups=shared_groups,
+        peer_indices=read_only_array(peers),
+        group_indices=read_only_array(rows + columns + boxes),
+        cell_groups=read_only_array([(r, length + c, 2 * length + b) for r, c, b in cell_ids]),
+        board_template=board_template,
+        cell_offsets=cell_offsets
+    )
+
+
 def is_same_column(cells: Iterable[Cell]) -> bool:
     """
     Test to see if all cells are in the same column
@@ -644,8 +1012,8 @@ def is_same_column(cells: Iterable[Cell]) -> bool:
     :return: True if same column, false otherwise
     """
 
-    if cells: cells = list(cells)
-    return cells and [c.location.x for c in cells].count(cells[0].location.x) == len(cells)
+    cells = list(cells)
+    return not cells or all(c.column_id == cells[0].column_id for c in cells[1:])
 
 
 def is_same_row(cells: Iterable[Cell]) -> bool:
@@ -656,8 +1024,8 @@ def is_same_row(cells: Iterable[Cell]) -> bool:
     :return: True if same row, false otherwise
     """
 
-    if cells: cells = list(cells)
-    return not cells or [c.location.y for c in cells].count(cells[0].location.y) == len(cells)
+    cells = list(cells)
+    return not cells or all(c.row_id == cells[0].row_id for c in cells[1:])
 
 
 def is_same_box(cells: Iterable[Cell]) -> bool:
@@ -668,12 +1036,42 @@ def is_same_box(cells: Iterable[Cell]) -> bool:
     :return: True if same box, false otherwise
     """
 
-    if cells: cells = list(cells)
-    return not cells or [c.box for c in cells].count(cells[0].box) == len(cells)
+    cells = list(cells)
+    return not cells or all(c.box_id == cells[0].box_id for c in cells[1:])
+
+
+def find_subsets(masks: List[int], max_length: int) -> Iterator[Tuple[Tuple[int, ...], int]]:
+    """
+    Finds the subsets of at least 2 masks whose union has exactly as many bits as the subset has masks. The subsets are
+    grown one mask at a time and a branch is dropped as soon as its union has more than max_length bits. A subset is
+    not extended any further once it closes, though a larger subset reached through other masks can still contain it
+
+    :param masks: The bitmasks to search
+    :param max_length: The largest subset to search for
+    :return: The indices of the masks in each subset, and their union
+    """
+
+    def extend(indices: Tuple[int, ...], union: int, start: int) -> Iterator[Tuple[Tuple[int, ...], int]]:
+        for i in range(start, len(masks)):
+            grown = union | masks[i]
+            count = popcount(grown)
+            if count > max_length: continue
+            subset = indices + (i,)
+            if count == len(subset) and len(subset) > 1:
+                yield subset, grown
+            elif len(subset) < max_length:
+                yield from extend(subset, grown, i + 1)
+
+    return extend((), NO_CANDIDATES, 0)
 
 
 def modify_cell_candidates(cells: Iterable[Cell], op: ModifyOperation,
-                           candidates: Set[int]) -> List[Cell]:
+                           candidates: int) -> List[Cell]:
     if not cells or not candidates: return []
-    for cell in cells: cell.candidates = op(cell.candidates, candidates)
-    return [c for c in cells if c.candidates_changed()]
+    modified = []
+    for cell in cells:
+        new_candidates = op(cell.candidates, candidates)
+        if new_candidates != cell.candidates:
+            cell.candidates = new_candidates
+            modified.append(cell)
+    return modified
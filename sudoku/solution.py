@@ -13,7 +13,7 @@ def plural_s(count):
 
 
 def print_candidates(candidates):
-    return ", ".join([str(v) for v in candidates])
+    return ", ".join([str(v) for v in bit_positions(candidates)])
 
 
 def print_cells(cells):
@@ -21,16 +21,16 @@ def print_cells(cells):
 
 
 class CellAction(object):
-    def __init__(self, cell: sudoku.Cell, old: Optional[Set[int]] = None, new: Optional[Set[int]] = None) -> None:
+    def __init__(self, cell: sudoku.Cell, old: Optional[int] = None, new: Optional[int] = None) -> None:
         self.cell = cell
         self.old = old if old else cell.old_candidates
         self.new = new if new else cell.candidates
-        self.op = "+" if len(self.new) > len(self.old) else "-"
-        self.change = self.old.symmetric_difference(self.new)
+        self.op = "+" if popcount(self.new) > popcount(self.old) else "-"
+        self.change = self.old ^ self.new
 
     def __str__(self) -> str:
         return "Candidate{s} {candidates} {op} cell ( {cell} )".format(
-            s=plural_s(len(self.change)),
+            s=plural_s(popcount(self.change)),
             candidates=print_candidates(self.change),
             op="added to" if self.op is "+" else "removed from",
             cell=self.cell.var_to_string("location")
@@ -38,7 +38,7 @@ class CellAction(object):
 
 
 class Action(object):
-    def __init__(self, op: ActionOperation, cells: Iterable[sudoku.Cell], values: Set[int]) -> None:
+    def __init__(self, op: ActionOperation, cells: Iterable[sudoku.Cell], values: int) -> None:
         self.op = op
         self.cells = list(cells)
         self.values = values
@@ -53,7 +53,7 @@ class Action(object):
             ))
         elif self.op is ActionOperation.DIFFERENCE:
             buffer.append("Candidate{s} {candidates} removed from cell{s2} ( {cells} )".format(
-                s=plural_s(len(self.values)),
+                s=plural_s(popcount(self.values)),
                 candidates=print_candidates(self.values),
                 s2=plural_s(len(self.cells)),
                 cells=print_cells(self.cells)
@@ -78,11 +78,11 @@ class Action(object):
 
 
 class Step(object):
-    def __init__(self, technique: Technique, cells: Iterable[sudoku.Cell], values: Set[int],
+    def __init__(self, technique: Technique, cells: Iterable[sudoku.Cell], values: int,
                  actions: Optional[Iterable[Action]] = None) -> None:
         self.technique = technique
         self.cells = list(cells)
-        self.values = set(values)
+        self.values = values
         self.actions = list(actions) if actions else None
 
     def __str__(self) -> str:
@@ -126,6 +126,8 @@ class Step(object):
                     type_str = "Fish[{}] ".format(self.technique.size)
             elif self.technique.type is TechniqueArchetype.WING:
                 type_str = "XY-Wing "
+            elif self.technique.type is TechniqueArchetype.SEARCH:
+                type_str = "Search "
             else:
                 type_str = "{}[{}] ".format(self.technique.type, self.technique.size)
             buffer.append("{type} in cell{s} ( {cells} )".format(
@@ -152,22 +154,22 @@ class Step(object):
 
 
 def action_solve(cell: sudoku.Cell) -> Action:
-    return Action(ActionOperation.SOLVE, [cell], {cell.value})
+    return Action(ActionOperation.SOLVE, [cell], 1 << cell.value)
 
 
-def action_difference(cells: Iterable[sudoku.Cell], candidates: Set[int]) -> Action:
+def action_difference(cells: Iterable[sudoku.Cell], candidates: int) -> Action:
     return Action(ActionOperation.DIFFERENCE, cells, candidates)
 
 
-def action_intersection(cells: Iterable[sudoku.Cell], candidates: Set[int]) -> Action:
+def action_intersection(cells: Iterable[sudoku.Cell], candidates: int) -> Action:
     return Action(ActionOperation.INTERSECTION, cells, candidates)
 
 
-def action_equal(cell: sudoku.Cell, candidates: Set[int]) -> Action:
+def action_equal(cell: sudoku.Cell, candidates: int) -> Action:
     return Action(ActionOperation.EQUAL, [cell], candidates)
 
 
-def step_populate(cells: Iterable[sudoku.Cell], candidates: Set[int]) -> Step:
+def step_populate(cells: Iterable[sudoku.Cell], candidates: int) -> Step:
     cells = list(cells)
     return Step(
         Technique(TechniqueArchetype.POPULATE, len(cells)),